@@ -1,11 +1,16 @@
 """# Kernel Explainer"""
 
-from gshap.utils import get_columns, get_data
+from gshap.cache import LRUCache
+from gshap.masker import Masker, SparseMasker
+from gshap.utils import (
+    fingerprint, get_columns, get_data, get_dtypes, issparse, sparse
+)
 
-from random import choices, shuffle
 import numpy as np
 import pandas as pd
 
+import warnings
+
 
 class KernelExplainer():
     """
@@ -19,26 +24,59 @@ class KernelExplainer():
         an output which will be fed into `g`. For ordinary SHAP, the model 
         returns a (# observations, # targets) output vector.
     
-    data : numpy.array or pandas.DataFrame or pandas.Series
+    data : numpy.array or pandas.DataFrame or pandas.Series or scipy.sparse matrix
         Background dataset from which values are randomly sampled to simulate 
-        absent features.
+        absent features. Sparse background data is never densified; the 
+        model receives `scipy.sparse.csr_matrix` inputs.
 
-    g : callable, default=lambda x: x.mean()
+    g : callable or list of callables or dict, default=lambda x: x.mean()
         Callable which takes the `model` output and returns a scalar. Defaults
-        to the mean of the output, which is the classical SHAP value.
+        to the mean of the output, which is the classical SHAP value. If `g` 
+        is a list or dict of callables, G-SHAP values are computed for every 
+        `g` in one pass; each model output is computed once and shared by all 
+        `g` functions.
+
+    dtype : numpy.dtype or None, default=None
+        Data type of the masked matrices passed to the model. If `None`, the 
+        data type of the comparison and background data is preserved, 
+        including the column data types of a `pandas.DataFrame`. Set to 
+        `numpy.float32` to halve the memory bandwidth of masking float data.
+
+    cache_size : int or None, default=None
+        Maximum number of `g(model(.))` values to cache. If `None`, caching is 
+        disabled. When caching is enabled, the explainer uses common random 
+        numbers: sample `m` uses the same feature ordering and background 
+        rows for every feature and every call with the same comparison data, 
+        so coalitions repeat and their model outputs are looked up in a 
+        least recently used cache keyed on (coalition, sample index). This 
+        pays off for expensive models with few features. `gshap_values` 
+        needs a `cache_size` of at least `# features + 1`, and warns if the 
+        cache is smaller. Reusing values across repeated `gshap_value` calls 
+        needs a `cache_size` of at least `2 * nsamples` for the same feature, 
+        and up to `nsamples * (# features + 1)` across features.
 
     Attributes
     ----------
     model : callable
         Set from the `model` parameter.
 
-    data : numpy.array
+    data : numpy.array or scipy.sparse.csr_matrix
         Set from the `data` parameter. If `data` is a `pandas` object, it is 
-        automatically converted to a `numpy.array`.
+        automatically converted to a `numpy.array`. If `data` is a sparse 
+        matrix, it is converted to CSR format.
 
-    g : callable
+    g : callable or list of callables or dict
         Set from the `g` parameter.
 
+    dtype : numpy.dtype or None
+        Set from the `dtype` parameter.
+
+    cache : gshap.cache.LRUCache or None
+        Cache of `g(model(.))` values, or `None` if caching is disabled. The 
+        cache is cleared automatically when the background data or the 
+        comparison data change. Call `clear_cache` after changing `model` or 
+        `g`.
+
     Examples
     --------
     This example shows how to compute classical SHAP values.
@@ -79,10 +117,15 @@ class KernelExplainer():
     22.53280632411067, 22.52089950825812
     ```
     """
-    def __init__(self, model, data, g=lambda x: x.mean()):
+    def __init__(
+            self, model, data, g=lambda x: x.mean(), dtype=None, 
+            cache_size=None
+        ):
+        self.cache = None if cache_size is None else LRUCache(cache_size)
         self.model = model
         self.data = data
         self.g = g
+        self.dtype = dtype
 
     @property
     def data(self):
@@ -90,16 +133,48 @@ class KernelExplainer():
 
     @data.setter
     def data(self, X):
-        self._data = (
-            X.values if isinstance(X, (pd.DataFrame, pd.Series)) else X
-        )
+        if issparse(X):
+            self._data = X.tocsr()
+        else:
+            self._data = (
+                X.values if isinstance(X, (pd.DataFrame, pd.Series)) else X
+            )
         self.N, self.P = self._data.shape
+        self._masking_data = None
+        self.clear_cache()
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, dtype):
+        self._dtype = dtype
+        self._masking_data = None
 
     @property
     def nsamples(self):
         """Default number of samples to draw to approximate G-SHAP values"""
         return 2 * self.P + 2**11
 
+    def clear_cache(self):
+        """Clear the cache and redraw the common random numbers"""
+        # base seed for the common random numbers, drawn on first use
+        self._seed = None
+        self._X_fingerprint = None
+        if self.cache is not None:
+            self.cache.clear()
+
+    def cache_info(self):
+        """
+        Returns
+        -------
+        cache_info : gshap.cache.CacheInfo or None
+            Named tuple of `(hits, misses, maxsize, currsize)`, or `None` if 
+            caching is disabled.
+        """
+        return None if self.cache is None else self.cache.info()
+
     def compare(self, X, bootstrap_samples=1000):
         """
         Compares the background data `self.data` to the comparison data `X` 
@@ -107,7 +182,7 @@ class KernelExplainer():
 
         Parameters
         ----------
-        X : numpy.array or pandas.Series or pandas.DataFrame
+        X : numpy.array or pandas.Series or pandas.DataFrame or scipy.sparse matrix
             (# samples, # features) matrix of comparison data.
 
         bootstrap_samples : int, default=1000
@@ -116,22 +191,37 @@ class KernelExplainer():
 
         Returns
         -------
-        g_comparison : float
-            *g(model(X))*, where *X* is the comparison data.
+        g_comparison : float or np.array
+            *g(model(X))*, where *X* is the comparison data. If `self.g` is a 
+            list or dict, this is a (# g functions,) vector.
 
-        g_background : float
-            *g(model(X_b))*, where *X_b* is the shuffled background data.
+        g_background : float or np.array
+            *g(model(X_b))*, where *X_b* is the shuffled background data. If 
+            `self.g` is a list or dict, this is a (# g functions,) vector.
         """
         def compute_g_background():
-            sample = np.array(choices(self.data, k=X.shape[0]))
-            if columns is not None:
-                sample = pd.DataFrame(columns=columns, data=sample)
-            return self.g(self.model(sample))
-
-        columns = get_columns(X)
-        X = X.to_frame().T if isinstance(X, pd.Series) else X
+            sample = data[np.random.randint(self.N, size=X.shape[0])]
+            if use_sparse:
+                sample = sparse.csr_matrix(sample)
+            else:
+                sample = self._to_model_input(sample, columns, data_dtypes)
+            return self._compute_g(self.model(sample))
+
+        # match gshap_values so the model receives the same input types
+        columns, dtypes = get_columns(X), get_dtypes(X)
+        X, data = get_data(X), self._get_masking_data()
+        if self.dtype is not None:
+            X = X.astype(self.dtype)
+        use_sparse = issparse(X) or issparse(data)
+        if use_sparse:
+            X = sparse.csr_matrix(X)
+        else:
+            data_dtypes = self._get_restore_dtypes(columns, dtypes, data.dtype)
+            X = self._to_model_input(
+                X, columns, self._get_restore_dtypes(columns, dtypes, X.dtype)
+            )
         g_data = [compute_g_background() for _ in range(bootstrap_samples)]
-        return self.g(self.model(X)), sum(g_data) / len(g_data)
+        return self._compute_g(self.model(X)), sum(g_data) / len(g_data)
         
     def gshap_values(self, X, **kwargs):
         """
@@ -139,7 +229,7 @@ class KernelExplainer():
 
         Parameters
         ----------
-        X : numpy.array or pandas.DataFrame or pandas.Series
+        X : numpy.array or pandas.DataFrame or pandas.Series or scipy.sparse matrix
             A (# samples, # features) matrix.
 
         nsamples : scalar or 'auto', default='auto'
@@ -148,11 +238,30 @@ class KernelExplainer():
         Returns
         -------
         gshap_values : np.array
-            (# features,) vector of G-SHAP values ordered by feature index.
+            (# features,) vector of G-SHAP values ordered by feature index. If 
+            `self.g` is a list or dict, this is a (# g functions, # features) 
+            matrix whose rows are in the order of `self.g`.
         """
-        return np.array(
-            [self.gshap_value(j, X, **kwargs) for j in range(self.P)]
-        )
+        masker, columns, dtypes = self._get_masker(X)
+        nsamples = kwargs.get('nsamples', self.nsamples)
+        if self.cache is not None and self.cache.maxsize < self.P + 1:
+            warnings.warn(
+                'cache_size={} is smaller than the {} entries needed to '
+                'reuse model outputs; the cache is unlikely to produce '
+                'hits.'.format(self.cache.maxsize, self.P + 1)
+            )
+        seed = self._get_seed()
+        # loop over samples first so the P + 1 coalitions of each sample are 
+        # reused while they are still in the cache
+        phi = []
+        for m in range(nsamples):
+            rows, order = self._draw(seed, m, masker.X.shape[0])
+            phi.append([
+                self._compute_phi(j, masker, columns, dtypes, m, rows, order)
+                for j in range(self.P)
+            ])
+        # transpose so rows index g functions when g is a list or dict
+        return np.array(phi).mean(axis=0).T
 
     def gshap_value(self, j, X, **kwargs):
         """
@@ -163,7 +272,7 @@ class KernelExplainer():
         j : scalar or column name
             The index or column name of the feature of interest.
 
-        X : numpy.array or pandas.DataFrame or pandas.Series
+        X : numpy.array or pandas.DataFrame or pandas.Series or scipy.sparse matrix
             A (# samples, # features) matrix.
 
         nsamples : scalar or 'auto', default='auto'
@@ -171,45 +280,177 @@ class KernelExplainer():
 
         Returns
         -------
-        gshap_value : float
-            Approximated G-SHAP value for feature `j` (float).
+        gshap_value : float or np.array
+            Approximated G-SHAP value for feature `j` (float). If `self.g` is 
+            a list or dict, this is a (# g functions,) vector.
         """
         j = list(X.columns).index(j) if isinstance(j, str) else j
+        masker, columns, dtypes = self._get_masker(X)
+        return self._gshap_value(j, masker, columns, dtypes, **kwargs)
+
+    def _get_masking_data(self):
+        """Get the background data cast to `self.dtype`
+
+        The cast is computed once and reused until `data` or `dtype` change.
+        """
+        if self._masking_data is None:
+            if self.dtype is None:
+                self._masking_data = self.data
+            elif issparse(self.data):
+                self._masking_data = self.data.astype(self.dtype)
+            else:
+                self._masking_data = np.asarray(self.data, dtype=self.dtype)
+        return self._masking_data
+
+    def _get_masker(self, X):
+        """Get the masking engine for comparison data `X`
+
+        Returns
+        -------
+        masker : gshap.masker.Masker or gshap.masker.SparseMasker
+
+        columns : list or None
+            Column names passed to the model.
+
+        dtypes : pandas.Series or None
+            Column data types to restore after masking, if masking a 
+            `pandas.DataFrame` changed them.
+        """
+        columns, dtypes = get_columns(X), get_dtypes(X)
+        X = get_data(X)
+        # Ensure feature dimension of X matches that of the background data
+        assert X.shape[1] == self.P
+        data = self._get_masking_data()
+        if issparse(X) or issparse(data):
+            # the model receives sparse matrices, which have no column names
+            masker, columns = SparseMasker(X, data, self.dtype), None
+        else:
+            masker = Masker(X, data, self.dtype)
+        dtypes = self._get_restore_dtypes(columns, dtypes, masker.X.dtype)
+        if self.cache is not None:
+            X_fingerprint = fingerprint(masker.X)
+            if X_fingerprint != self._X_fingerprint:
+                self.clear_cache()
+                self._X_fingerprint = X_fingerprint
+        return masker, columns, dtypes
+
+    def _get_restore_dtypes(self, columns, dtypes, dtype):
+        """Get the column data types to restore on a `pandas.DataFrame` 
+        built from a `dtype` matrix, or `None` if there is nothing to restore
+        """
+        if (
+            columns is None or self.dtype is not None or dtypes is None
+            or (dtypes == dtype).all()
+        ):
+            # the matrix already has the requested data types
+            return None
+        return dtypes
+
+    def _gshap_value(self, j, masker, columns, dtypes, **kwargs):
+        """Compute the G-SHAP value for feature index `j`"""
         nsamples = kwargs.get('nsamples', self.nsamples)
-        phi = [self._compute_phi(j, X) for m in range(nsamples)]
+        seed = self._get_seed()
+        phi = []
+        for m in range(nsamples):
+            rows, order = self._draw(seed, m, masker.X.shape[0])
+            phi.append(
+                self._compute_phi(j, masker, columns, dtypes, m, rows, order)
+            )
         return sum(phi) / len(phi)
 
-    def _compute_phi(self, j, X):
+    def _get_seed(self):
+        """Get the base seed for one G-SHAP computation
+
+        If caching is enabled, the base seed is drawn once and reused until 
+        the cache is cleared (common random numbers). Otherwise, every 
+        computation draws a fresh base seed. Seeds come from the global 
+        `numpy.random` state, so `numpy.random.seed` makes results 
+        reproducible.
+        """
+        if self.cache is None:
+            return np.random.randint(np.iinfo(np.int32).max)
+        if self._seed is None:
+            self._seed = np.random.randint(np.iinfo(np.int32).max)
+        return self._seed
+
+    def _draw(self, seed, m, n):
+        """Draw `n` background row indices and a feature ordering
+
+        The draw for sample index `m` is rebuilt on demand from the base 
+        `seed`, so nothing is stored per sample.
+        """
+        random_state = np.random.default_rng([seed, m])
+        return (
+            random_state.integers(self.N, size=n), 
+            random_state.permutation(self.P)
+        )
+
+    def _compute_phi(self, j, masker, columns, dtypes, m, rows, order):
         """Approximate G-SHAP value for feature `j` for one sample
         
         This method approximates the G-SHAP value by Monte Carlo sampling.
-        1. Construct `Z` by sampling observations from the background dataset.
-        2. Shuffle the order of the features.
+        1. Sample row indices of observations from the background dataset 
+        (`rows`, drawn by `_draw`).
+        2. Shuffle the order of the features (`order`, drawn by `_draw`).
         3. Construct `X_mj` (X minus the j'th feature) as all features from X 
-        which come before j. Absent features are filled in from `Z`.
+        which come before j. Absent features are filled in from the sampled 
+        background observations.
         4. Construct `X_pj` (X plus the j'th feature) by adding the original 
         j'th feature from `X` to `X_mj`.
         5. Return phi = g(model(X_pj)) - g(model(X_mj)).
-        """
-        columns = get_columns(X)
-        X = get_data(X)
-        # Ensure feature dimension of X matches that of the background data
-        assert X.shape[1] == self.P
 
-        Z = np.array(choices(self.data, k=X.shape[0]))
+        `X_mj` and `X_pj` are buffers owned by `masker`, which are overwritten 
+        on the next sample.
 
-        order = np.array(list(range(self.P)))
-        np.random.shuffle(order)
-        j_idx = order[j]
-
-        X_mj = (
-            (order < j_idx).astype(int) * X 
-            + (order >= j_idx).astype(int) * Z
-        )
-        X_pj = X_mj.copy()
-        X_pj[:,j] = X[:,j]
+        If caching is enabled, g(model(.)) values are looked up by 
+        (coalition bitmask, sample index `m`) before evaluating the model.
+        """
+        if self.cache is None:
+            X_mj, X_pj = masker(order, j, rows)
+            return (
+                self._compute_g_model(X_pj, columns, dtypes) 
+                - self._compute_g_model(X_mj, columns, dtypes)
+            )
+
+        present = order < order[j]
+        key_mj = (np.packbits(present).tobytes(), m)
+        present[j] = True
+        key_pj = (np.packbits(present).tobytes(), m)
+        g_mj, g_pj = self.cache.get(key_mj), self.cache.get(key_pj)
+        if g_mj is None or g_pj is None:
+            X_mj, X_pj = masker(order, j, rows)
+            if g_mj is None:
+                g_mj = self.cache[key_mj] = self._compute_g_model(
+                    X_mj, columns, dtypes
+                )
+            if g_pj is None:
+                g_pj = self.cache[key_pj] = self._compute_g_model(
+                    X_pj, columns, dtypes
+                )
+        return g_pj - g_mj
+
+    def _compute_g_model(self, X, columns, dtypes):
+        """Compute g(model(X)) for a masked matrix `X`"""
+        X = self._to_model_input(X, columns, dtypes)
+        return self._compute_g(self.model(X))
+
+    def _to_model_input(self, X, columns, dtypes):
+        """Convert a data matrix to a `pandas.DataFrame` if the comparison 
+        data had column names, restoring the column data types `dtypes`"""
         if columns is not None:
-            X_mj = pd.DataFrame(columns=columns, data=X_mj)
-            X_pj = pd.DataFrame(columns=columns, data=X_pj)
+            X = pd.DataFrame(columns=columns, data=X)
+        if dtypes is not None:
+            X = X.astype(dtypes)
+        return X
 
-        return self.g(self.model(X_pj)) - self.g(self.model(X_mj))
\ No newline at end of file
+    def _compute_g(self, output):
+        """Apply `self.g` to the model output
+
+        If `self.g` is a list or dict, every g function is applied to the 
+        same output and a (# g functions,) vector is returned.
+        """
+        if isinstance(self.g, dict):
+            return np.array([g(output) for g in self.g.values()])
+        if isinstance(self.g, (list, tuple)):
+            return np.array([g(output) for g in self.g])
+        return self.g(output)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""Model output cache"""
+
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache():
+    """
+    Size-bounded cache which evicts the least recently used entry.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries.
+
+    Attributes
+    ----------
+    maxsize : int
+        Set from the `maxsize` parameter.
+
+    hits : int
+        Number of lookups which found an entry.
+
+    misses : int
+        Number of lookups which did not find an entry.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __setitem__(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        """
+        Look up `key`, marking it as most recently used.
+
+        Parameters
+        ----------
+        key : hashable
+
+        default : object, default=None
+            Returned if `key` is not in the cache.
+
+        Returns
+        -------
+        value : object
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def clear(self):
+        """Remove all entries and reset the hit and miss counts"""
+        self.hits = self.misses = 0
+        self._entries.clear()
+
+    def info(self):
+        """
+        Returns
+        -------
+        cache_info : CacheInfo
+            Named tuple of `(hits, misses, maxsize, currsize)`.
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
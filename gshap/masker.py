@@ -0,0 +1,187 @@
+"""Masking engine
+
+Builds the masked data matrices which the Kernel Explainer feeds into the
+model. Dense masked matrices are written into buffers which are allocated
+once and reused for every sample. Sparse masked matrices combine the
+non-zero entries of the present columns of the comparison data with those
+of the absent columns of the sampled background data.
+"""
+
+from gshap.utils import sparse
+
+import numpy as np
+
+
+class Masker():
+    """
+    Builds the *X minus j* and *X plus j* matrices for a comparison dataset.
+
+    Parameters
+    ----------
+    X : numpy.array
+        (# samples, # features) comparison data.
+
+    data : numpy.array
+        (# background observations, # features) background data. `data` is 
+        only copied if its data type differs from `dtype`, so callers should 
+        cast it once and reuse it.
+
+    dtype : numpy.dtype or None, default=None
+        Data type of the masked matrices. If `None`, the data type is the
+        common type of `X` and `data`, so float32 and non-numeric data are
+        preserved.
+
+    Attributes
+    ----------
+    X : numpy.array
+        Set from the `X` parameter, cast to `dtype`.
+
+    data : numpy.array
+        Set from the `data` parameter, cast to `dtype`.
+
+    X_mj : numpy.array
+        Buffer for the *X minus j* matrix.
+
+    X_pj : numpy.array
+        Buffer for the *X plus j* matrix.
+
+    Z : numpy.array
+        Buffer for the sampled background observations. It is refilled only 
+        when the masker is called with new background row indices, so the 
+        features of one sample share a single gather.
+    """
+    def __init__(self, X, data, dtype=None):
+        if dtype is None:
+            dtype = np.result_type(X, data)
+        self.X = np.asarray(X, dtype=dtype)
+        self.data = np.asarray(data, dtype=dtype)
+        self.X_mj = np.empty_like(self.X)
+        self.X_pj = np.empty_like(self.X)
+        self.Z = np.empty_like(self.X)
+        self._rows = None
+        self._present = np.empty(self.X.shape[1], dtype=bool)
+
+    def __call__(self, order, j, rows):
+        """
+        Parameters
+        ----------
+        order : numpy.array
+            (# features,) vector giving the position of each feature in a
+            random ordering of the features.
+
+        j : int
+            Index of the feature of interest.
+
+        rows : numpy.array
+            (# samples,) vector of background data row indices used to fill
+            in absent features. Pass the same array for every feature of a 
+            sample to reuse the sampled background observations.
+
+        Returns
+        -------
+        X_mj : numpy.array
+            Features which come before `j` in `order` are taken from `X`.
+            Remaining features are taken from the background data.
+
+        X_pj : numpy.array
+            `X_mj` with feature `j` taken from `X`.
+        """
+        if rows is not self._rows:
+            # rows are valid indices; mode='clip' avoids buffering the output
+            np.take(self.data, rows, axis=0, out=self.Z, mode='clip')
+            self._rows = rows
+        np.less(order, order[j], out=self._present)
+        np.copyto(self.X_mj, self.Z)
+        np.copyto(self.X_mj, self.X, where=self._present)
+        np.copyto(self.X_pj, self.X_mj)
+        self.X_pj[:,j] = self.X[:,j]
+        return self.X_mj, self.X_pj
+
+
+class SparseMasker():
+    """
+    Builds the *X minus j* and *X plus j* matrices for sparse data. Memory 
+    scales with the number of non-zero entries rather than the matrix size.
+
+    Parameters
+    ----------
+    X : scipy.sparse matrix or numpy.array
+        (# samples, # features) comparison data.
+
+    data : scipy.sparse matrix or numpy.array
+        (# background observations, # features) background data.
+
+    dtype : numpy.dtype or None, default=None
+        Data type of the masked matrices. If `None`, the data type is the
+        common type of `X` and `data`.
+
+    Attributes
+    ----------
+    X : scipy.sparse.csr_matrix
+        Set from the `X` parameter.
+
+    data : scipy.sparse.csr_matrix
+        Set from the `data` parameter. Stored in row format for fast row 
+        sampling.
+
+    Z : scipy.sparse.csr_matrix or None
+        Sampled background observations. It is rebuilt only when the masker 
+        is called with new background row indices, so the features of one 
+        sample share a single gather.
+    """
+    def __init__(self, X, data, dtype=None):
+        if dtype is None:
+            dtype = np.result_type(X.dtype, data.dtype)
+        self.X = sparse.csr_matrix(X, dtype=dtype)
+        self.data = sparse.csr_matrix(data, dtype=dtype)
+        self.Z = self._rows = None
+
+    def __call__(self, order, j, rows):
+        """
+        Parameters
+        ----------
+        order : numpy.array
+            (# features,) vector giving the position of each feature in a
+            random ordering of the features.
+
+        j : int
+            Index of the feature of interest.
+
+        rows : numpy.array
+            (# samples,) vector of background data row indices used to fill
+            in absent features. Pass the same array for every feature of a 
+            sample to reuse the sampled background observations.
+
+        Returns
+        -------
+        X_mj : scipy.sparse.csr_matrix
+            Features which come before `j` in `order` are taken from `X`.
+            Remaining features are taken from the background data.
+
+        X_pj : scipy.sparse.csr_matrix
+            `X_mj` with feature `j` taken from `X`.
+        """
+        if rows is not self._rows:
+            self.Z, self._rows = self.data[rows], rows
+        present = order < order[j]
+        X_mj = self._combine(present)
+        present[j] = True
+        X_pj = self._combine(present)
+        return X_mj, X_pj
+
+    def _combine(self, present):
+        """Combine present columns of `X` with absent columns of `Z`"""
+        return (
+            _select_columns(self.X, present) 
+            + _select_columns(self.Z, ~present)
+        )
+
+
+def _select_columns(A, keep):
+    # Drop the entries of CSR matrix `A` outside the columns in boolean 
+    # vector `keep`, without reordering or densifying
+    mask = keep[A.indices]
+    indptr = np.concatenate([[0], np.cumsum(mask)])[A.indptr]
+    return sparse.csr_matrix(
+        (A.data[mask], A.indices[mask], indptr), shape=A.shape
+    )
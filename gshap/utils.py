@@ -1,7 +1,15 @@
 """G-SHAP utilities"""
 
+import numpy as np
 import pandas as pd
 
+from hashlib import sha1
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
 def get_columns(X):
     """Get columns
 
@@ -18,16 +26,79 @@ def get_columns(X):
     if isinstance(X, pd.Series):
         return list(X.index)
 
+def get_dtypes(X):
+    """Get column data types
+
+    Parameters
+    ----------
+    X : numpy.array or pandas.DataFrame or pandas.Series
+
+    Returns
+    -------
+    dtypes : pandas.Series or None
+        Data type of each column if `X` is a `pandas.DataFrame`.
+    """
+    if isinstance(X, pd.DataFrame):
+        return X.dtypes
+
 def get_data(X):
     """Get data matrix
 
     Parameters
     ----------
-    X : numpy.array or pandas.DataFrame or pandas.Series
+    X : numpy.array or pandas.DataFrame or pandas.Series or scipy.sparse matrix
 
     Returns
     -------
-    (# samples x # features) numpy.array
+    (# samples x # features) numpy.array or scipy.sparse.csr_matrix
     """
+    if issparse(X):
+        return X.tocsr()
     X = X.values if isinstance(X, (pd.Series, pd.DataFrame)) else X
-    return X.reshape(1, X.shape[0]) if len(X.shape)==1 else X
\ No newline at end of file
+    return X.reshape(1, X.shape[0]) if len(X.shape)==1 else X
+
+def issparse(X):
+    """Indicates that `X` is a `scipy.sparse` matrix
+
+    Parameters
+    ----------
+    X : object
+
+    Returns
+    -------
+    issparse : bool
+    """
+    if sparse is None:
+        if hasattr(X, 'tocsr'):
+            raise ImportError(
+                'Sparse inputs require scipy. Install it with '
+                '`pip install gshap[sparse]`.'
+            )
+        return False
+    return sparse.issparse(X)
+
+def fingerprint(X):
+    """Hash the contents of a data matrix
+
+    Parameters
+    ----------
+    X : numpy.array or scipy.sparse matrix
+
+    Returns
+    -------
+    fingerprint : str
+        Hex digest which changes whenever the shape or values of `X` change.
+    """
+    if issparse(X):
+        X = X.tocsr()
+        arrays = [X.data, X.indices, X.indptr]
+    else:
+        arrays = [X]
+    digest = sha1(str(X.shape).encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            # object arrays hold pointers; hash the values instead
+            array = pd.util.hash_array(array.ravel())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
@@ -23,5 +23,8 @@ setuptools.setup(
         'numpy>=1.18.4',
         'pandas>=1.0.3',
     ],
+    extras_require={
+        'sparse': ['scipy'],
+    },
     python_requires='>=3.6',
 )
\ No newline at end of file
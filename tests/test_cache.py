@@ -0,0 +1,84 @@
+import gshap
+
+import numpy as np
+import pytest
+
+import warnings
+
+P, NSAMPLES = 5, 200
+
+
+def model(X):
+    return X @ np.arange(1, P+1)
+
+
+def make_data(seed=0):
+    return np.random.RandomState(seed).randn(50, P)
+
+
+def test_gshap_values_reuses_prefix_coalitions():
+    X = make_data()
+    explainer = gshap.KernelExplainer(model, X, cache_size=P+1)
+    explainer.gshap_values(X, nsamples=NSAMPLES)
+    hits, misses, _, currsize = explainer.cache_info()
+    # each sample evaluates its P + 1 prefix coalitions once
+    assert misses == NSAMPLES * (P+1)
+    assert hits == 2 * P * NSAMPLES - misses
+    assert currsize == P + 1
+
+
+def test_repeated_gshap_value_hits_cache():
+    X = make_data()
+    explainer = gshap.KernelExplainer(model, X, cache_size=NSAMPLES*(P+1))
+    explainer.gshap_value(0, X, nsamples=NSAMPLES)
+    explainer.gshap_value(0, X, nsamples=NSAMPLES)
+    hits, misses, _, _ = explainer.cache_info()
+    assert misses == 2 * NSAMPLES
+    assert hits == 2 * NSAMPLES
+
+
+def test_cached_values_equal_uncached():
+    X = make_data()
+    np.random.seed(0)
+    uncached = gshap.KernelExplainer(model, X).gshap_values(
+        X, nsamples=NSAMPLES
+    )
+    np.random.seed(0)
+    cached = gshap.KernelExplainer(model, X, cache_size=P+1).gshap_values(
+        X, nsamples=NSAMPLES
+    )
+    np.testing.assert_allclose(cached, uncached)
+
+
+def test_cache_cleared_when_comparison_data_changes():
+    X = make_data()
+    explainer = gshap.KernelExplainer(model, X, cache_size=NSAMPLES*(P+1))
+    explainer.gshap_value(0, X, nsamples=10)
+    explainer.gshap_value(0, X+1, nsamples=10)
+    assert explainer.cache_info().hits == 0
+
+
+def test_small_cache_warns():
+    X = make_data()
+    explainer = gshap.KernelExplainer(model, X, cache_size=P)
+    with pytest.warns(UserWarning):
+        explainer.gshap_values(X, nsamples=10)
+
+
+def test_repeated_gshap_value_does_not_warn():
+    X = make_data()
+    explainer = gshap.KernelExplainer(model, X, cache_size=100)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        explainer.gshap_value(0, X, nsamples=50)
+        explainer.gshap_value(0, X, nsamples=50)
+    assert explainer.cache_info().hits == 100
+
+
+def test_draws_are_reproduced_from_seed():
+    X = make_data()
+    explainer = gshap.KernelExplainer(model, X, cache_size=P+1)
+    first = explainer.gshap_values(X, nsamples=20)
+    np.testing.assert_allclose(explainer.gshap_values(X, nsamples=20), first)
+    explainer.clear_cache()
+    assert explainer.gshap_values(X, nsamples=20) != pytest.approx(first)
@@ -0,0 +1,81 @@
+import gshap
+from gshap.masker import Masker
+
+import numpy as np
+import pandas as pd
+import pytest
+
+P = 4
+
+
+def make_frame(seed=0):
+    random_state = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'x': random_state.randn(30).astype(np.float32),
+        'n': random_state.randint(0, 5, 30),
+        's': random_state.choice(['a', 'b'], 30),
+        'c': pd.Categorical(
+            random_state.choice(['u', 'v'], 30), categories=['u', 'v', 'w']
+        ),
+    })
+
+
+def test_masker_matches_mask_arithmetic():
+    random_state = np.random.RandomState(0)
+    X, data = random_state.randn(20, P), random_state.randn(10, P)
+    masker = Masker(X, data)
+    rows = random_state.randint(10, size=20)
+    order = random_state.permutation(P)
+    Z = data[rows]
+    for j in range(P):
+        X_mj, X_pj = masker(order, j, rows)
+        expected_mj = (
+            (order < order[j]).astype(int) * X 
+            + (order >= order[j]).astype(int) * Z
+        )
+        expected_pj = expected_mj.copy()
+        expected_pj[:,j] = X[:,j]
+        np.testing.assert_array_equal(X_mj, expected_mj)
+        np.testing.assert_array_equal(X_pj, expected_pj)
+
+
+def test_masker_refills_background_for_new_rows():
+    X, data = np.zeros((3, P)), np.arange(2*P).reshape(2, P)
+    masker = Masker(X, data)
+    order = np.arange(P)
+    X_mj, _ = masker(order, 0, np.zeros(3, dtype=int))
+    np.testing.assert_array_equal(X_mj, data[[0, 0, 0]])
+    X_mj, _ = masker(order, 0, np.ones(3, dtype=int))
+    np.testing.assert_array_equal(X_mj, data[[1, 1, 1]])
+
+
+@pytest.mark.parametrize('dtype', [None, np.float32])
+def test_float32_preserved(dtype):
+    X = np.random.RandomState(0).randn(20, P)
+    X = X.astype(np.float32) if dtype is None else X
+    dtypes = set()
+
+    def model(X):
+        dtypes.add(X.dtype)
+        return X.sum(axis=1)
+
+    explainer = gshap.KernelExplainer(model, X, dtype=dtype)
+    explainer.gshap_values(X, nsamples=5)
+    explainer.compare(X, bootstrap_samples=5)
+    assert dtypes == {np.dtype(np.float32)}
+
+
+def test_dataframe_column_dtypes_preserved():
+    X = make_frame()
+    dtypes = []
+
+    def model(X):
+        dtypes.append(X.dtypes)
+        return X['x'] * (X['c'] == 'u') + X['n'] * (X['s'] == 'a')
+
+    explainer = gshap.KernelExplainer(model, X)
+    explainer.gshap_values(X, nsamples=5)
+    explainer.compare(X, bootstrap_samples=5)
+    assert len(dtypes) == 2 * P * 5 + 5 + 1
+    for model_dtypes in dtypes:
+        pd.testing.assert_series_equal(model_dtypes, X.dtypes)
@@ -0,0 +1,75 @@
+import gshap
+from gshap.intergroup import IntergroupDifference
+
+import numpy as np
+import pytest
+
+P, NSAMPLES = 4, 20
+
+
+def make_data(seed=0):
+    return np.random.RandomState(seed).randn(30, P)
+
+
+def model(X):
+    return X @ np.arange(1, P+1)
+
+
+def make_gs(X):
+    return {
+        'mean': lambda output: output.mean(),
+        'std': lambda output: output.std(),
+        'intergroup': IntergroupDifference(X[:,0] > 0),
+    }
+
+
+def single_g_values(X, gs, method):
+    values = []
+    for g in gs:
+        np.random.seed(0)
+        values.append(method(gshap.KernelExplainer(model, X, g)))
+    return np.array(values)
+
+
+@pytest.mark.parametrize('as_dict', [True, False])
+def test_gshap_values_match_single_g(as_dict):
+    X = make_data()
+    gs = make_gs(X)
+    g = gs if as_dict else list(gs.values())
+    np.random.seed(0)
+    values = gshap.KernelExplainer(model, X, g).gshap_values(
+        X, nsamples=NSAMPLES
+    )
+    assert values.shape == (len(gs), P)
+    np.testing.assert_allclose(values, single_g_values(
+        X, gs.values(), lambda e: e.gshap_values(X, nsamples=NSAMPLES)
+    ))
+
+
+def test_gshap_value_and_compare_match_single_g():
+    X = make_data()
+    gs = make_gs(X)
+    explainer = gshap.KernelExplainer(model, X, gs)
+    np.random.seed(0)
+    value = explainer.gshap_value(1, X, nsamples=NSAMPLES)
+    np.testing.assert_allclose(value, single_g_values(
+        X, gs.values(), lambda e: e.gshap_value(1, X, nsamples=NSAMPLES)
+    ))
+    np.random.seed(0)
+    comparison = np.array(explainer.compare(X, bootstrap_samples=5))
+    np.testing.assert_allclose(comparison, single_g_values(
+        X, gs.values(), lambda e: e.compare(X, bootstrap_samples=5)
+    ).T)
+
+
+def test_model_called_once_per_coalition():
+    X = make_data()
+    calls = []
+
+    def counting_model(X):
+        calls.append(X)
+        return model(X)
+
+    explainer = gshap.KernelExplainer(counting_model, X, make_gs(X))
+    explainer.gshap_values(X, nsamples=NSAMPLES)
+    assert len(calls) == 2 * P * NSAMPLES
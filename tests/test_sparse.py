@@ -0,0 +1,71 @@
+import gshap
+from gshap.masker import Masker, SparseMasker
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+P = 5
+WEIGHTS = np.arange(1, P+1)
+
+
+def make_data(seed=0):
+    X = np.random.RandomState(seed).randn(40, P)
+    return X * (X > 0.5)
+
+
+def test_sparse_masker_matches_dense_masker():
+    random_state = np.random.RandomState(0)
+    X, data = make_data(0), make_data(1)
+    dense_masker = Masker(X, data)
+    sparse_masker = SparseMasker(sparse.csr_matrix(X), sparse.csr_matrix(data))
+    rows = random_state.randint(40, size=40)
+    order = random_state.permutation(P)
+    for j in range(P):
+        for dense, sparse_ in zip(
+                dense_masker(order, j, rows), sparse_masker(order, j, rows)
+            ):
+            assert sparse.isspmatrix_csr(sparse_)
+            np.testing.assert_array_equal(sparse_.toarray(), dense)
+
+
+def test_sparse_gshap_values_match_dense():
+    X, data = make_data(0), make_data(1)
+    np.random.seed(0)
+    dense = gshap.KernelExplainer(lambda X: X @ WEIGHTS, data).gshap_values(
+        X, nsamples=20
+    )
+    np.random.seed(0)
+    explainer = gshap.KernelExplainer(
+        lambda X: X @ WEIGHTS, sparse.csr_matrix(data)
+    )
+    np.testing.assert_allclose(
+        explainer.gshap_values(sparse.csr_matrix(X), nsamples=20), dense
+    )
+
+
+@pytest.mark.parametrize('X_format,data_format', [
+    ('coo', 'csr'), ('csr', 'dense'), ('dense', 'csr'), ('frame', 'csr')
+])
+def test_compare_sends_csr(X_format, data_format):
+    def convert(A, fmt):
+        if fmt == 'dense':
+            return A
+        if fmt == 'frame':
+            return pd.DataFrame(A)
+        return sparse.coo_matrix(A) if fmt == 'coo' else sparse.csr_matrix(A)
+
+    inputs = []
+
+    def model(X):
+        inputs.append(X)
+        return X @ WEIGHTS
+
+    X, data = make_data(0), make_data(1)
+    explainer = gshap.KernelExplainer(model, convert(data, data_format))
+    g_comparison, _ = explainer.compare(
+        convert(X, X_format), bootstrap_samples=3
+    )
+    assert all(sparse.isspmatrix_csr(X) for X in inputs)
+    assert g_comparison == pytest.approx((X @ WEIGHTS).mean())